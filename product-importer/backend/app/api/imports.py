@@ -0,0 +1,38 @@
+# Import job ledger endpoints
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_read_db
+from app import crud, schemas
+import math
+
+router = APIRouter(prefix="/api/imports", tags=["imports"])
+
+
+@router.get("", response_model=schemas.PaginatedImportJobResponse)
+def list_imports(
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=100),
+    status: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    skip = (page - 1) * size
+    jobs, total = crud.get_import_jobs(db, skip=skip, limit=size, status=status)
+    
+    pages = math.ceil(total / size) if total > 0 else 1
+    
+    return {
+        "items": jobs,
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": pages
+    }
+
+
+@router.get("/{job_id}", response_model=schemas.ImportJobResponse)
+def get_import(job_id: str, db: Session = Depends(get_read_db)):
+    job = crud.get_import_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
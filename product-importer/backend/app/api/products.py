@@ -1,49 +1,147 @@
 # Product CRUD endpoints
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 from typing import Optional
-from app.database import get_db
+from contextlib import ExitStack
+from itertools import chain
+from app.database import get_db, get_read_db, read_session
 from app import crud, schemas
+from app.config import settings
+from app.utils.catalog_cache import make_etag, etag_matches
 import math
+import orjson
 
 router = APIRouter(prefix="/api/products", tags=["products"])
 
 
+# Field order matches ProductResponse serialization
+PRODUCT_FIELDS = list(schemas.ProductResponse.model_fields)
+
+
+def _parse_fields(fields: Optional[str]) -> list[str]:
+    if not fields:
+        return PRODUCT_FIELDS
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    if not requested:
+        raise HTTPException(status_code=400, detail="fields must name at least one field")
+    unknown = requested - set(PRODUCT_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in PRODUCT_FIELDS if field in requested]
+
+
+def _cache_headers(etag: Optional[str]) -> dict:
+    headers = {"Cache-Control": settings.products_cache_control}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
 @router.get("", response_model=schemas.PaginatedProductResponse)
 def list_products(
+    request: Request,
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
     sku: Optional[str] = None,
     name: Optional[str] = None,
     active: Optional[bool] = None,
     description: Optional[str] = None,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,sku,name"),
+    db: Session = Depends(get_read_db)
 ):
+    # The version is read from the page's own session before querying, so a
+    # concurrent write can only make the ETag older than the body, never
+    # newer - on a lagging replica too, since the version replicates with the rows
+    version = crud.get_catalog_version(db)
+    etag = make_etag("products", version, sorted(request.query_params.multi_items())) if version else None
+    if etag and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    
+    # Fast path: select plain columns and encode with orjson, skipping ORM
+    # instances and per-item pydantic validation
+    selected = _parse_fields(fields)
     skip = (page - 1) * size
-    products, total = crud.get_products(
-        db, skip=skip, limit=size, 
+    products, total = crud.get_product_rows(
+        db, selected, skip=skip, limit=size,
         sku=sku, name=name, active=active, description=description
     )
     
     pages = math.ceil(total / size) if total > 0 else 1
     
-    return {
-        "items": products,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": pages
-    }
+    return Response(
+        content=orjson.dumps({
+            "items": products,
+            "total": total,
+            "page": page,
+            "size": size,
+            "pages": pages
+        }),
+        media_type="application/json",
+        headers=_cache_headers(etag)
+    )
 
 
 @router.get("/{product_id}", response_model=schemas.ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db)
+):
+    # Cheap primary-key lookup first; the row is only loaded on a cache miss
+    version = crud.get_product_version(db, product_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    etag = make_etag("product", product_id, version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    
     product = crud.get_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    
+    response.headers.update(_cache_headers(etag))
     return product
 
 
+@router.post("/lookup", response_model=schemas.ProductLookupResponse)
+def lookup_products(lookup: schemas.ProductLookupRequest):
+    """Resolve many SKUs (case-insensitive) at once; unknown SKUs are listed in missing"""
+    skus = [sku.strip() for sku in lookup.skus if sku.strip()]
+    
+    # Own session: the response body is produced after dependencies exit.
+    # The query runs and its first batch is fetched here, so database errors
+    # still become a 500 instead of a truncated 200 body
+    stack = ExitStack()
+    try:
+        db = stack.enter_context(read_session())
+        batches = crud.iter_products_by_skus(db, PRODUCT_FIELDS, skus)
+        first = next(batches, [])
+    except Exception:
+        stack.close()
+        raise
+    
+    def stream():
+        missing = []
+        separator = b""
+        with stack:
+            yield b'{"items":['
+            for rows in chain([first], batches):
+                items = [row for _, row in rows if row is not None]
+                missing.extend(sku for sku, row in rows if row is None)
+                if items:
+                    yield separator + b",".join(orjson.dumps(item) for item in items)
+                    separator = b","
+        yield b'],"missing":' + orjson.dumps(missing) + b"}"
+    
+    # The background task also runs when the client disconnects before the
+    # body starts, so the session and its cursor never wait for the GC
+    return StreamingResponse(stream(), media_type="application/json", background=BackgroundTask(stack.close))
+
+
 @router.post("", response_model=schemas.ProductResponse, status_code=201)
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
     existing = crud.get_product_by_sku(db, product.sku)
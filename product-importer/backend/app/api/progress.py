@@ -2,20 +2,61 @@
 from fastapi import APIRouter, HTTPException
 from sse_starlette.sse import EventSourceResponse
 from app.tasks.celery_app import celery_app
+from app.database import read_session
+from app import crud, schemas
+from sqlalchemy.exc import SQLAlchemyError
 import json
 import asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 
 router = APIRouter(prefix="/api/progress", tags=["progress"])
 
 
+def _ledger_event(task_id: str) -> Optional[dict]:
+    """
+    Final progress event from the import_jobs ledger, for tasks whose Celery
+    result has expired (Celery then reports them as PENDING).
+
+    Freshly queued tasks are PENDING too, so a database error here must not
+    end their stream: it is logged and treated as "no ledger entry".
+    """
+    try:
+        with read_session() as db:
+            job = crud.get_import_job(db, task_id)
+            if job is None or job.status not in ("completed", "failed"):
+                return None
+            result = schemas.ImportJobResponse.model_validate(job).model_dump(mode="json")
+    except SQLAlchemyError as e:
+        print(f"Import ledger lookup failed for {task_id}: {str(e)}")
+        return None
+    
+    if result["status"] == "failed":
+        return {
+            "state": "FAILURE",
+            "status": "Import failed",
+            "error": result["error"] or "Unknown error",
+            "current": 0,
+            "total": 0,
+            "percent": 0
+        }
+    return {
+        "state": "SUCCESS",
+        "current": result["processed_rows"],
+        "total": result["total_rows"] or result["processed_rows"],
+        "percent": 100,
+        "status": "Complete!",
+        "result": result
+    }
+
+
 @router.get("/{task_id}")
 async def get_progress(task_id: str):
     """Stream task progress using Server-Sent Events"""
     
     async def event_generator() -> AsyncGenerator:
         previous_state = None
+        ledger_checked = False
         
         try:
             while True:
@@ -23,6 +64,16 @@ async def get_progress(task_id: str):
                     # Get task status from Celery
                     task = celery_app.AsyncResult(task_id)
                     
+                    if task.state == 'PENDING' and not ledger_checked:
+                        ledger_checked = True
+                        final = await asyncio.to_thread(_ledger_event, task_id)
+                        if final is not None:
+                            yield {
+                                "event": "progress",
+                                "data": json.dumps(final)
+                            }
+                            break
+                    
                     if task.state == 'PENDING':
                         data = {
                             "state": "PENDING",
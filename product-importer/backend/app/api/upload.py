@@ -1,46 +1,170 @@
 # File upload endpoint
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from app.tasks.import_tasks import import_products_task
-from app.schemas import UploadResponse
-from app.config import settings
-from app.utils.csv_processor import validate_csv_headers
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from app.tasks.celery_app import celery_app
+from app.tasks.queues import select_import_queue, reserve_queue_rows, release_queue_rows, estimate_wait_seconds, get_queue_stats
+from app import crud
+from app.database import get_db
+from app.schemas import UploadResponse, QueueStatusResponse
+from app.utils.csv_headers import validate_csv_headers
+from app.utils.rejects import reject_file_path
+from app.utils.upload_store import (
+    StoredUpload, UploadTooLarge, store_upload, commit_upload, discard_upload, claim_content, release_content, content_mode
+)
+from typing import Literal, Optional
+from datetime import datetime
+from uuid import uuid4
+import asyncio
 import os
-import aiofiles
 
 router = APIRouter(prefix="/api/upload", tags=["upload"])
 
 
 @router.post("", response_model=UploadResponse)
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(
+    file: UploadFile = File(...),
+    priority: Optional[Literal["high", "normal", "low"]] = Form(None),
+    force: bool = Form(False),
+    mode: Literal["upsert", "sync"] = Form("upsert"),
+    sync_action: Literal["deactivate", "delete"] = Form("deactivate"),
+    db: Session = Depends(get_db)
+):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
     
-    os.makedirs(settings.upload_dir, exist_ok=True)
+    try:
+        stored = await store_upload(file)
+    except UploadTooLarge:
+        raise HTTPException(status_code=400, detail="File too large")
     
-    file_path = os.path.join(settings.upload_dir, file.filename)
+    # Header check, Redis claim, ledger write and dispatch all block, so
+    # they run off the event loop
+    return await asyncio.to_thread(
+        _enqueue_upload, db, stored, file.filename, priority, force, mode, sync_action
+    )
+
+
+def _enqueue_upload(
+    db: Session,
+    stored: StoredUpload,
+    filename: str,
+    priority: Optional[str],
+    force: bool,
+    mode: str,
+    sync_action: str
+) -> dict:
+    """Validate a stored upload, claim its content and queue the import job."""
+    file_path = None
+    task_id = str(uuid4())
+    claimed = False
+    queue = None
+    reserved_rows = 0
+    job_recorded = False
+    registry_mode = content_mode(mode, sync_action)
     
     try:
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            if len(content) > settings.max_upload_size:
-                raise HTTPException(status_code=400, detail="File too large")
-            await f.write(content)
-        
-        is_valid, message = validate_csv_headers(file_path)
+        is_valid, message = validate_csv_headers(stored.temp_path)
         if not is_valid:
-            os.remove(file_path)
+            discard_upload(stored)
             raise HTTPException(status_code=400, detail=message)
         
-        task = import_products_task.apply_async(args=[file_path])
+        # Identical content: attach to the running import or skip a finished one
+        existing = claim_content(
+            stored.content_hash, task_id, force, registry_mode, crud.get_catalog_version(db)
+        )
+        if existing:
+            discard_upload(stored)
+            if existing["status"] == "completed":
+                message = "Identical file was already imported. Upload with force=true to import it again."
+            else:
+                message = "Identical file is already being processed."
+            return {
+                "task_id": existing["task_id"],
+                "message": message,
+                "duplicate": True
+            }
+        claimed = True
+        
+        file_path = commit_upload(stored, registry_mode)
+        
+        queue = select_import_queue(stored.rows, stored.size, priority)
+        crud.save_import_job(
+            db, task_id,
+            status="queued",
+            mode=mode,
+            queue=queue,
+            file_name=filename[:255],
+            content_hash=stored.content_hash,
+            file_size=stored.size,
+            total_rows=stored.rows
+        )
+        job_recorded = True
+        backlog = reserve_queue_rows(queue, stored.rows)
+        reserved_rows = stored.rows
+        
+        # Dispatch by name so the API never imports the worker (pandas) stack
+        celery_app.send_task(
+            "import_products_task",
+            args=[file_path],
+            kwargs={
+                "estimated_rows": stored.rows,
+                "content_hash": stored.content_hash,
+                "mode": mode,
+                "sync_action": sync_action
+            },
+            queue=queue,
+            task_id=task_id
+        )
         
         return {
-            "task_id": task.id,
-            "message": "File uploaded successfully. Processing started."
+            "task_id": task_id,
+            "message": "File uploaded successfully. Processing started.",
+            "queue": queue,
+            "estimated_wait_seconds": estimate_wait_seconds(backlog)
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        if os.path.exists(file_path):
+        discard_upload(stored)
+        if file_path and os.path.exists(file_path):
             os.remove(file_path)
+        if claimed:
+            release_content(stored.content_hash, task_id, registry_mode)
+        if reserved_rows:
+            release_queue_rows(queue, reserved_rows)
+        if job_recorded:
+            # The job never reached the broker; don't leave it listed as queued
+            try:
+                db.rollback()
+                crud.save_import_job(
+                    db, task_id,
+                    status="failed",
+                    error=f"Dispatch failed: {str(e)}",
+                    finished_at=datetime.utcnow()
+                )
+            except SQLAlchemyError as ledger_error:
+                print(f"Import ledger update failed for {task_id}: {str(ledger_error)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+@router.get("/queues", response_model=list[QueueStatusResponse])
+def list_queues():
+    """Depth and estimated wait of each import queue"""
+    return get_queue_stats()
+
+
+@router.get("/{task_id}/rejects")
+def download_rejects(task_id: str):
+    """Download the rows an import rejected, with the reason for each"""
+    try:
+        path = reject_file_path(task_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Reject file not found")
+    
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Reject file not found")
+    
+    return FileResponse(path, media_type="text/csv", filename=f"rejects-{task_id}.csv")
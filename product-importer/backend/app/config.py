@@ -5,12 +5,47 @@ from typing import Optional
 
 class Settings(BaseSettings):
     database_url: str
+    database_replica_url: Optional[str] = None
+    database_sslmode: str = "require"
+    database_connect_timeout: int = 10
     redis_url: str
     celery_broker_url: str
     celery_result_backend: str
+    # Engine profiles (see app.database.ENGINE_PROFILES); timeouts in ms, 0 = none
+    api_read_pool_size: int = 10
+    api_read_max_overflow: int = 20
+    api_read_statement_timeout_ms: int = 5000
+    api_write_pool_size: int = 5
+    api_write_max_overflow: int = 10
+    api_write_statement_timeout_ms: int = 30000
+    import_pool_size: int = 1
+    import_max_overflow: int = 1
+    import_statement_timeout_ms: int = 0
+    run_migrations_on_startup: bool = False
     upload_dir: str = "./uploads"
+    reject_dir: str = "./rejects"
+    reject_retention_seconds: int = 2592000
     max_upload_size: int = 524288000
+    # How long identical uploads attach to / skip an earlier import
+    duplicate_processing_ttl: int = 21600
+    duplicate_completed_ttl: int = 2592000
     chunk_size: int = 10000
+    # Sent with product GETs; no-cache lets clients revalidate with ETags
+    products_cache_control: str = "no-cache"
+    # Adaptive batch sizing (chunk_size is the starting size)
+    import_batch_target_seconds: float = 1.0
+    import_min_batch_size: int = 500
+    import_max_batch_size: int = 50000
+    import_memory_budget_mb: int = 256
+    # Parsed chunks buffered between the CSV parser and the DB writer
+    import_pipeline_depth: int = 2
+    # Queue routing thresholds (see app.tasks.queues)
+    small_import_max_rows: int = 50000
+    small_import_max_bytes: int = 20971520
+    bulk_import_min_rows: int = 1000000
+    bulk_import_min_bytes: int = 209715200
+    import_rows_per_second: int = 20000
+    import_queue_counter_ttl: int = 21600
     
     class Config:
         env_file = ".env"
@@ -1,48 +1,139 @@
 # Database operations (CRUD logic)
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
-from app.models import Product, Webhook
+from sqlalchemy import Text, any_, bindparam, cast, func, literal_column, or_, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from app.models import Product, Webhook, ImportJob, CatalogVersion
 from app.schemas import ProductCreate, ProductUpdate, WebhookCreate, WebhookUpdate
-from typing import Optional, List
+from typing import Optional, List, Iterator
+from datetime import datetime
 
 
 def get_product(db: Session, product_id: int) -> Optional[Product]:
     return db.query(Product).filter(Product.id == product_id).first()
 
 
+def get_product_version(db: Session, product_id: int) -> Optional[str]:
+    """
+    Row version for the detail ETag, or None if the product doesn't exist.
+
+    updated_at alone isn't enough: an import stamps every row with the same
+    time, so a SKU written by two batches keeps it. xmin (the id of the
+    transaction that last wrote the row) changes on every committed write.
+    """
+    row = db.execute(
+        select(cast(literal_column("products.xmin"), Text).label("xmin"), Product.updated_at).where(Product.id == product_id)
+    ).one_or_none()
+    return f"{row[0]}:{row[1].isoformat()}" if row is not None else None
+
+
 def get_product_by_sku(db: Session, sku: str) -> Optional[Product]:
     return db.query(Product).filter(func.lower(Product.sku) == sku.lower()).first()
 
 
-def get_products(
-    db: Session,
-    skip: int = 0,
-    limit: int = 100,
+def _product_filters(
     sku: Optional[str] = None,
     name: Optional[str] = None,
     active: Optional[bool] = None,
     description: Optional[str] = None
-) -> tuple[List[Product], int]:
-    query = db.query(Product)
-    
+) -> list:
+    conditions = []
     if sku:
-        query = query.filter(Product.sku.ilike(f"%{sku}%"))
+        conditions.append(Product.sku.ilike(f"%{sku}%"))
     if name:
-        query = query.filter(Product.name.ilike(f"%{name}%"))
+        conditions.append(Product.name.ilike(f"%{name}%"))
     if active is not None:
-        query = query.filter(Product.active == active)
+        conditions.append(Product.active == active)
     if description:
-        query = query.filter(Product.description.ilike(f"%{description}%"))
+        conditions.append(Product.description.ilike(f"%{description}%"))
+    return conditions
+
+
+def get_product_rows(
+    db: Session,
+    fields: List[str],
+    skip: int = 0,
+    limit: int = 100,
+    sku: Optional[str] = None,
+    name: Optional[str] = None,
+    active: Optional[bool] = None,
+    description: Optional[str] = None
+) -> tuple[List[dict], int]:
+    """Filtered page of products with only the given columns, as plain dicts, plus the total count."""
+    conditions = _product_filters(sku, name, active, description)
     
-    total = query.count()
-    products = query.offset(skip).limit(limit).all()
+    total = db.execute(
+        select(func.count()).select_from(Product).where(*conditions)
+    ).scalar_one()
+    result = db.execute(
+        select(*[getattr(Product, field) for field in fields])
+        .where(*conditions)
+        .offset(skip)
+        .limit(limit)
+    )
+    rows = [dict(zip(fields, row)) for row in result]
     
-    return products, total
+    return rows, total
+
+
+def iter_products_by_skus(
+    db: Session,
+    fields: List[str],
+    skus: List[str],
+    batch_size: int = 1000
+) -> Iterator[List[tuple[str, Optional[dict]]]]:
+    """
+    Resolve SKUs case-insensitively in one pass: the requested SKUs are
+    unnested WITH ORDINALITY, de-duplicated on lower(sku) and LEFT JOINed to
+    products on ix_products_sku_lower. Streamed from a server-side cursor in
+    batches of (requested sku, row) pairs in request order; row is None for
+    SKUs that don't exist.
+    """
+    values = func.unnest(bindparam("skus", skus, type_=ARRAY(Text))).table_valued("sku", with_ordinality="ord")
+    # First spelling of each SKU the caller sent
+    wanted = (
+        select(values.c.sku, values.c.ord)
+        .distinct(func.lower(values.c.sku))
+        .order_by(func.lower(values.c.sku), values.c.ord)
+        .subquery("wanted")
+    )
+    stmt = (
+        select(wanted.c.sku, Product.id.is_not(None), *[getattr(Product, field) for field in fields])
+        .select_from(wanted.outerjoin(Product, func.lower(Product.sku) == func.lower(wanted.c.sku)))
+        .order_by(wanted.c.ord)
+    )
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [(row[0], dict(zip(fields, row[2:])) if row[1] else None) for row in partition]
+
+
+def get_catalog_version(db: Session) -> Optional[str]:
+    """
+    Version of the product catalog as seen by this session (list ETags).
+
+    Read it from the session that serves the page: the counter commits with
+    the product writes, so a replica returns the version of its own snapshot.
+    """
+    version = db.execute(
+        select(CatalogVersion.version).where(CatalogVersion.id == 1)
+    ).scalar_one_or_none()
+    return str(version) if version is not None else None
+
+
+def bump_catalog_version(db: Session) -> None:
+    """Advance the catalog version inside the transaction that writes products, right before commit."""
+    db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(version=CatalogVersion.version + 1),
+        execution_options={"synchronize_session": False}
+    )
 
 
 def create_product(db: Session, product: ProductCreate) -> Product:
     db_product = Product(**product.model_dump())
     db.add(db_product)
+    db.flush()
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_product)
     return db_product
@@ -57,6 +148,8 @@ def update_product(db: Session, product_id: int, product: ProductUpdate) -> Opti
     for field, value in update_data.items():
         setattr(db_product, field, value)
     
+    db.flush()
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_product)
     return db_product
@@ -68,12 +161,18 @@ def delete_product(db: Session, product_id: int) -> bool:
         return False
     
     db.delete(db_product)
+    db.flush()
+    bump_catalog_version(db)
     db.commit()
     return True
 
 
 def delete_all_products(db: Session) -> int:
+    # A full-catalog delete outlasts the api_write statement timeout;
+    # SET LOCAL lifts it for this transaction only
+    db.execute(text("SET LOCAL statement_timeout = 0"))
     count = db.query(Product).delete()
+    bump_catalog_version(db)
     db.commit()
     return count
 
@@ -116,3 +215,34 @@ def delete_webhook(db: Session, webhook_id: int) -> bool:
     db.delete(db_webhook)
     db.commit()
     return True
+
+
+def get_import_job(db: Session, job_id: str) -> Optional[ImportJob]:
+    return db.query(ImportJob).filter(ImportJob.id == job_id).first()
+
+
+def get_import_jobs(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None
+) -> tuple[List[ImportJob], int]:
+    query = db.query(ImportJob)
+    if status:
+        query = query.filter(ImportJob.status == status)
+    
+    total = query.count()
+    jobs = query.order_by(ImportJob.created_at.desc()).offset(skip).limit(limit).all()
+    
+    return jobs, total
+
+
+def save_import_job(db: Session, job_id: str, **fields) -> None:
+    """Create or update an import job ledger entry."""
+    stmt = insert(ImportJob).values(id=job_id, created_at=datetime.utcnow(), **fields)
+    if fields:
+        stmt = stmt.on_conflict_do_update(index_elements=['id'], set_=fields)
+    else:
+        stmt = stmt.on_conflict_do_nothing()
+    db.execute(stmt)
+    db.commit()
@@ -1,19 +1,76 @@
 # SQLAlchemy engine & session setup
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    connect_args={"sslmode": "require"}
-)
+# Pool sizing and statement timeout per role. api_read serves listings
+# (from the replica when configured), api_write serves API mutations and
+# import is used by Celery workers, one small pool per prefork child.
+ENGINE_PROFILES = {
+    "api_read": {
+        "pool_size": settings.api_read_pool_size,
+        "max_overflow": settings.api_read_max_overflow,
+        "statement_timeout_ms": settings.api_read_statement_timeout_ms,
+    },
+    "api_write": {
+        "pool_size": settings.api_write_pool_size,
+        "max_overflow": settings.api_write_max_overflow,
+        "statement_timeout_ms": settings.api_write_statement_timeout_ms,
+    },
+    "import": {
+        "pool_size": settings.import_pool_size,
+        "max_overflow": settings.import_max_overflow,
+        "statement_timeout_ms": settings.import_statement_timeout_ms,
+    },
+}
+
+# After a failed replica connection, reads go to the primary for this long
+REPLICA_RETRY_SECONDS = 30
+
+_replica_down_until = 0.0
+
+
+@lru_cache(maxsize=None)
+def get_engine(role: str, replica: bool = False) -> Engine:
+    profile = ENGINE_PROFILES[role]
+    connect_args = {
+        "sslmode": settings.database_sslmode,
+        "connect_timeout": settings.database_connect_timeout,
+    }
+    if profile["statement_timeout_ms"]:
+        connect_args["options"] = f"-c statement_timeout={profile['statement_timeout_ms']}"
+    
+    return create_engine(
+        settings.database_replica_url if replica else settings.database_url,
+        pool_pre_ping=True,
+        pool_size=profile["pool_size"],
+        max_overflow=profile["max_overflow"],
+        connect_args=connect_args
+    )
+
+
+def dispose_engines():
+    """Drop pooled connections inherited from a parent process (call after fork)."""
+    for role in ENGINE_PROFILES:
+        get_engine(role).dispose(close=False)
+    if settings.database_replica_url:
+        get_engine("api_read", replica=True).dispose(close=False)
+
+
+engine = get_engine("api_write")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+ImportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine("import"))
+
 Base = declarative_base()
 
 
@@ -25,5 +82,33 @@ def get_db():
         db.close()
 
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+def _open_replica_session():
+    global _replica_down_until
+    if not settings.database_replica_url or time.monotonic() < _replica_down_until:
+        return None
+    
+    db = ReadSessionLocal(bind=get_engine("api_read", replica=True))
+    try:
+        db.connection()
+        return db
+    except OperationalError as e:
+        db.close()
+        _replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        print(f"Read replica unavailable, using primary: {str(e)}")
+        return None
+
+
+@contextmanager
+def read_session():
+    """Session for read-only queries: the replica if configured and reachable, else the primary."""
+    db = _open_replica_session() or ReadSessionLocal(bind=get_engine("api_read"))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    with read_session() as db:
+        yield db
+
@@ -1,14 +1,18 @@
 # FastAPI app initialization & routes
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import init_db
-from app.api import products, upload, progress, webhooks
+from app.config import settings
+from app.api import products, upload, progress, webhooks, imports
 from contextlib import asynccontextmanager
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    # Schema changes are applied by `python -m app.migrations` at deploy time;
+    # opt in here for local development only
+    if settings.run_migrations_on_startup:
+        from app.migrations import run_migrations
+        run_migrations()
     yield
 
 
@@ -31,6 +35,7 @@ app.include_router(products.router)
 app.include_router(upload.router)
 app.include_router(progress.router)
 app.include_router(webhooks.router)
+app.include_router(imports.router)
 
 
 @app.get("/")
@@ -0,0 +1,146 @@
+# Versioned schema migrations
+# Run before starting the API or workers: python -m app.migrations
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from app.config import settings
+
+# Arbitrary key so concurrent deploys don't apply migrations twice
+MIGRATION_LOCK_KEY = 720451
+
+# (version, name, statements) - append only, never edit an applied migration.
+# Version 1 matches the schema create_all used to build, so it is a no-op
+# on existing databases.
+MIGRATIONS = [
+    (1, "initial schema", [
+        """
+        CREATE TABLE IF NOT EXISTS products (
+            id SERIAL NOT NULL,
+            sku VARCHAR(100) NOT NULL,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            active BOOLEAN NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id)
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_products_sku ON products (sku)",
+        "CREATE INDEX IF NOT EXISTS ix_products_id ON products (id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_products_sku_lower ON products (lower(sku))",
+        """
+        CREATE TABLE IF NOT EXISTS webhooks (
+            id SERIAL NOT NULL,
+            url VARCHAR(500) NOT NULL,
+            event_type VARCHAR(50) NOT NULL,
+            enabled BOOLEAN NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_webhooks_id ON webhooks (id)",
+        """
+        CREATE UNLOGGED TABLE IF NOT EXISTS import_sync_skus (
+            task_id VARCHAR(36) NOT NULL,
+            sku_lower VARCHAR(100) NOT NULL,
+            PRIMARY KEY (task_id, sku_lower)
+        )
+        """,
+    ]),
+    (2, "import job ledger", [
+        """
+        CREATE TABLE import_jobs (
+            id VARCHAR(36) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            mode VARCHAR(20) NOT NULL,
+            queue VARCHAR(50),
+            file_name VARCHAR(255),
+            content_hash VARCHAR(64),
+            file_size BIGINT,
+            total_rows INTEGER,
+            processed_rows INTEGER NOT NULL DEFAULT 0,
+            inserted_rows INTEGER NOT NULL DEFAULT 0,
+            updated_rows INTEGER NOT NULL DEFAULT 0,
+            rejected_rows INTEGER NOT NULL DEFAULT 0,
+            removed_rows INTEGER NOT NULL DEFAULT 0,
+            parse_seconds DOUBLE PRECISION,
+            write_seconds DOUBLE PRECISION,
+            sync_seconds DOUBLE PRECISION,
+            total_seconds DOUBLE PRECISION,
+            rows_per_second DOUBLE PRECISION,
+            peak_memory_mb DOUBLE PRECISION,
+            error TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            started_at TIMESTAMP WITHOUT TIME ZONE,
+            finished_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id)
+        )
+        """,
+        "CREATE INDEX ix_import_jobs_status ON import_jobs (status)",
+        "CREATE INDEX ix_import_jobs_content_hash ON import_jobs (content_hash)",
+        "CREATE INDEX ix_import_jobs_created_at ON import_jobs (created_at)",
+    ]),
+    # Starts from a timestamp so a recreated table never reissues an old version
+    (3, "catalog version", [
+        """
+        CREATE TABLE catalog_version (
+            id SMALLINT NOT NULL,
+            version BIGINT NOT NULL,
+            PRIMARY KEY (id),
+            CHECK (id = 1)
+        )
+        """,
+        "INSERT INTO catalog_version (id, version) VALUES (1, (extract(epoch FROM clock_timestamp()) * 1000000)::bigint)",
+    ]),
+]
+
+
+def run_migrations() -> list[int]:
+    """
+    Apply pending migrations in one transaction.
+
+    Returns:
+        Versions that were applied
+    """
+    # Own engine: migrations must not inherit the API statement timeouts
+    engine = create_engine(
+        settings.database_url,
+        poolclass=NullPool,
+        connect_args={"sslmode": settings.database_sslmode}
+    )
+    applied_now = []
+    
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+                )
+            """))
+            applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+            
+            for version, name, statements in MIGRATIONS:
+                if version in applied:
+                    continue
+                for statement in statements:
+                    conn.execute(text(statement))
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                    {"version": version, "name": name}
+                )
+                applied_now.append(version)
+    finally:
+        engine.dispose()
+    
+    return applied_now
+
+
+if __name__ == "__main__":
+    versions = run_migrations()
+    if versions:
+        print(f"Applied migrations: {', '.join(str(v) for v in versions)}")
+    else:
+        print("Schema is up to date")
@@ -1,5 +1,5 @@
 # Product SQLAlchemy model
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index, func
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, Float, String, Boolean, DateTime, Text, Index, func
 from sqlalchemy.dialects.postgresql import CITEXT
 from app.database import Base
 from datetime import datetime
@@ -30,3 +30,49 @@ class Webhook(Base):
     enabled = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class CatalogVersion(Base):
+    """Single-row counter bumped in every transaction that writes products"""
+    __tablename__ = "catalog_version"
+    
+    id = Column(SmallInteger, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+
+
+class ImportSyncSku(Base):
+    """SKUs seen by a running sync import, cleared when the import finishes"""
+    __tablename__ = "import_sync_skus"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+    
+    task_id = Column(String(36), primary_key=True)
+    sku_lower = Column(String(100), primary_key=True)
+
+
+class ImportJob(Base):
+    """Ledger of import runs; id is the Celery task id"""
+    __tablename__ = "import_jobs"
+    
+    id = Column(String(36), primary_key=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    mode = Column(String(20), nullable=False, default="upsert")
+    queue = Column(String(50), nullable=True)
+    file_name = Column(String(255), nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
+    file_size = Column(BigInteger, nullable=True)
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    inserted_rows = Column(Integer, nullable=False, default=0)
+    updated_rows = Column(Integer, nullable=False, default=0)
+    rejected_rows = Column(Integer, nullable=False, default=0)
+    removed_rows = Column(Integer, nullable=False, default=0)
+    parse_seconds = Column(Float, nullable=True)
+    write_seconds = Column(Float, nullable=True)
+    sync_seconds = Column(Float, nullable=True)
+    total_seconds = Column(Float, nullable=True)
+    rows_per_second = Column(Float, nullable=True)
+    peak_memory_mb = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -65,6 +65,16 @@ class WebhookTestResponse(BaseModel):
 class UploadResponse(BaseModel):
     task_id: str
     message: str
+    queue: Optional[str] = None
+    estimated_wait_seconds: Optional[float] = None
+    duplicate: bool = False
+
+
+class QueueStatusResponse(BaseModel):
+    queue: str
+    depth: int
+    pending_rows: int
+    estimated_wait_seconds: float
 
 
 class ProgressResponse(BaseModel):
@@ -75,9 +85,58 @@ class ProgressResponse(BaseModel):
     status: str
 
 
+MAX_LOOKUP_SKUS = 50000
+
+
+class ProductLookupRequest(BaseModel):
+    skus: list[str] = Field(..., min_length=1, max_length=MAX_LOOKUP_SKUS)
+
+
+class ProductLookupResponse(BaseModel):
+    items: list[ProductResponse]
+    missing: list[str]
+
+
 class PaginatedProductResponse(BaseModel):
     items: list[ProductResponse]
     total: int
     page: int
     size: int
     pages: int
+
+
+class ImportJobResponse(BaseModel):
+    id: str
+    status: str
+    mode: str
+    queue: Optional[str] = None
+    file_name: Optional[str] = None
+    content_hash: Optional[str] = None
+    file_size: Optional[int] = None
+    total_rows: Optional[int] = None
+    processed_rows: int
+    inserted_rows: int
+    updated_rows: int
+    rejected_rows: int
+    removed_rows: int
+    parse_seconds: Optional[float] = None
+    write_seconds: Optional[float] = None
+    sync_seconds: Optional[float] = None
+    total_seconds: Optional[float] = None
+    rows_per_second: Optional[float] = None
+    peak_memory_mb: Optional[float] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class PaginatedImportJobResponse(BaseModel):
+    items: list[ImportJobResponse]
+    total: int
+    page: int
+    size: int
+    pages: int
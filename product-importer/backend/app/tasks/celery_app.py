@@ -1,6 +1,8 @@
 # Celery configuration
 from celery import Celery
+from kombu import Exchange, Queue
 from app.config import settings
+from app.tasks.queues import IMPORT_QUEUES, DEFAULT_QUEUE
 
 celery_app = Celery(
     "product_importer",
@@ -20,4 +22,8 @@ celery_app.conf.update(
     task_soft_time_limit=3300,
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    # Imports are routed per job by upload_csv (see app.tasks.queues);
+    # run a dedicated worker pool per queue with -Q
+    task_queues=[Queue(name, Exchange(name), routing_key=name) for name in IMPORT_QUEUES],
+    task_default_queue=DEFAULT_QUEUE,
 )
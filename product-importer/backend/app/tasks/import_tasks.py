@@ -1,12 +1,27 @@
 import pandas as pd
 from celery import Task
+from celery.signals import worker_process_init
+from sqlalchemy import Boolean, bindparam, delete, exists, func, literal_column, select, update
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
 from datetime import datetime
-from app.database import SessionLocal
-from app.models import Product
+from app import crud
+from app.database import ImportSessionLocal, dispose_engines
+from app.models import Product, ImportSyncSku
 from app.tasks.celery_app import celery_app
+from app.tasks.queues import release_queue_rows
+from app.config import settings
+from app.utils.batch_sizer import AdaptiveBatchSizer, estimate_row_bytes
+from app.utils.csv_processor import MAX_SKU_LENGTH, prepare_chunk, read_csv_chunks, count_csv_rows
+from app.utils.memory import PeakMemory
+from app.utils.pipeline import Prefetcher
+from app.utils.rejects import RejectWriter, prune_reject_files, reject_file_path
+from app.utils.upload_store import complete_content, release_content, content_mode
 import os
+import time
+
+UPSERT_COLUMNS = ['sku', 'name', 'description', 'active', 'created_at', 'updated_at']
 
 
 class DatabaseTask(Task):
@@ -15,7 +30,7 @@ class DatabaseTask(Task):
     @property
     def db(self):
         if self._db is None:
-            self._db = SessionLocal()
+            self._db = ImportSessionLocal()
         return self._db
 
     def after_return(self, *args, **kwargs):
@@ -24,87 +39,298 @@ class DatabaseTask(Task):
             self._db = None
 
 
+@worker_process_init.connect
+def _reset_engines(**kwargs):
+    # Prefork children must not share the parent's pooled connections
+    dispose_engines()
+
+
+class QueueBacklog:
+    """Tracks this job's share of its queue's pending rows (see app.tasks.queues)."""
+
+    def __init__(self, queue, rows: int):
+        self.queue = queue
+        self.rows = max(rows, 0)
+        self.released = 0
+
+    def advance(self, processed: int):
+        if self.queue is None:
+            return
+        delta = min(processed, self.rows) - self.released
+        if delta > 0:
+            release_queue_rows(self.queue, delta)
+            self.released += delta
+
+    def finish(self):
+        self.advance(self.rows)
+
+
+def _prepared_chunks(file_path: str, read_size: int, current_time: datetime, collect_skus: bool = False):
+    """
+    Parse, validate and transform the CSV chunk by chunk (pipeline producer).
+
+    Yields (records, row_numbers, rejected, raw_rows, seen_skus) for each
+    chunk. seen_skus lists the stripped SKUs present in the chunk, including
+    rejected rows, and is only filled when collect_skus is set. Case folding
+    happens in SQL when they are staged, matching the lower(sku) index.
+    """
+    for raw_chunk in read_csv_chunks(file_path, read_size):
+        seen_skus = []
+        if collect_skus:
+            skus = raw_chunk['sku'].str.strip()
+            stageable = (skus != '') & (skus.str.len() <= MAX_SKU_LENGTH) & ~skus.str.contains('\x00', regex=False)
+            seen_skus = skus[stageable].unique().tolist()
+        
+        # Vectorized validation - bad rows go to the reject file
+        chunk, rejected = prepare_chunk(raw_chunk)
+        
+        # Deduplicate within the chunk - keep last occurrence
+        chunk = chunk.drop_duplicates(subset=['sku'], keep='last')
+        chunk = chunk.assign(created_at=current_time, updated_at=current_time)
+        
+        # Convert chunk to list of dicts more efficiently
+        yield chunk.to_dict('records'), (chunk.index + 1).tolist(), rejected, len(raw_chunk), seen_skus
+
+
+def _dedupe_records(records: list, row_numbers: list) -> tuple[list, list]:
+    """Keep the last occurrence of each SKU - one upsert can't update a row twice."""
+    last_index = {record['sku']: i for i, record in enumerate(records)}
+    if len(last_index) == len(records):
+        return records, row_numbers
+    keep = sorted(last_index.values())
+    return [records[i] for i in keep], [row_numbers[i] for i in keep]
+
+
+def _build_upsert(values_list):
+    stmt = insert(Product).values(values_list)
+
+    # Define what to do on conflict (duplicate SKU)
+    return stmt.on_conflict_do_update(
+        index_elements=['sku'],
+        set_={
+            'name': stmt.excluded.name,
+            'description': stmt.excluded.description,
+            'active': stmt.excluded.active,
+            'updated_at': stmt.excluded.updated_at
+        }
+    )
+
+
+def _upsert_counted(db: Session, records: list) -> tuple[int, int]:
+    """Run the upsert and return (inserted, written) - xmax is 0 only for fresh rows."""
+    upserted = _build_upsert(records).returning(
+        literal_column('(xmax = 0)', Boolean).label('inserted')
+    ).cte('upserted')
+    inserted, written = db.execute(
+        select(func.count().filter(upserted.c.inserted), func.count()).select_from(upserted)
+    ).one()
+    return inserted, written
+
+
+def _upsert_with_bisect(db: Session, records: list, row_numbers: list, rejects: RejectWriter) -> tuple[int, int]:
+    """
+    Upsert a batch, bisecting it on data errors so only the offending
+    rows are rejected. Returns (inserted, written) row counts.
+    """
+    try:
+        counts = _upsert_counted(db, records)
+        if counts[1]:
+            crud.bump_catalog_version(db)
+        db.commit()
+        return counts
+    except (IntegrityError, DataError) as e:
+        db.rollback()
+        if len(records) == 1:
+            reason = str(e.orig).strip().splitlines()[0] if e.orig is not None else str(e)
+            rejects.write_record(row_numbers[0], records[0], reason)
+            return 0, 0
+
+    mid = len(records) // 2
+    left = _upsert_with_bisect(db, records[:mid], row_numbers[:mid], rejects)
+    right = _upsert_with_bisect(db, records[mid:], row_numbers[mid:], rejects)
+    return left[0] + right[0], left[1] + right[1]
+
+
+def _record_job(job_id: str, **fields) -> None:
+    """Write to the import_jobs ledger on its own session; never fails the import."""
+    try:
+        with ImportSessionLocal() as db:
+            crud.save_import_job(db, job_id, **fields)
+    except SQLAlchemyError as e:
+        print(f"Import ledger update failed for {job_id}: {str(e)}")
+
+
+def _stage_skus(db: Session, task_id: str, skus: list) -> None:
+    """Record SKUs seen by a sync import in the staging table."""
+    stmt = insert(ImportSyncSku).values(
+        task_id=bindparam('task_id'),
+        sku_lower=func.lower(bindparam('sku'))
+    ).on_conflict_do_nothing()
+    db.execute(stmt, [{'task_id': task_id, 'sku': sku} for sku in skus])
+    db.commit()
+
+
+def _clear_staged_skus(db: Session, task_id: str) -> None:
+    db.execute(delete(ImportSyncSku).where(ImportSyncSku.task_id == task_id))
+    db.commit()
+
+
+def _remove_missing_products(db: Session, task_id: str, action: str, current_time: datetime) -> int:
+    """
+    Deactivate or delete every product whose SKU the sync import didn't see,
+    in one set-based statement. Returns the number of products affected.
+    """
+    missing = ~exists().where(
+        ImportSyncSku.task_id == task_id,
+        ImportSyncSku.sku_lower == func.lower(Product.sku)
+    )
+    if action == 'delete':
+        stmt = delete(Product).where(missing)
+    else:
+        stmt = (
+            update(Product)
+            .where(Product.active.is_(True), missing)
+            .values(active=False, updated_at=current_time)
+        )
+    
+    removed = db.execute(stmt, execution_options={'synchronize_session': False}).rowcount
+    if removed:
+        crud.bump_catalog_version(db)
+    db.execute(delete(ImportSyncSku).where(ImportSyncSku.task_id == task_id))
+    db.commit()
+    return removed
+
+
 @celery_app.task(bind=True, base=DatabaseTask, name='import_products_task')
-def import_products_task(self, file_path: str, chunk_size: int = 5000):
+def import_products_task(
+    self,
+    file_path: str,
+    chunk_size: int = None,
+    estimated_rows: int = 0,
+    content_hash: str = None,
+    mode: str = 'upsert',
+    sync_action: str = 'deactivate'
+):
     """
     Import products from CSV file with duplicate handling - OPTIMIZED
+
+    Invalid rows are written to a reject file instead of failing the import.
+    With mode='sync' the file is treated as the full catalog: afterwards every
+    product missing from it is deactivated (sync_action='deactivate') or
+    deleted (sync_action='delete').
     """
+    if mode not in ('upsert', 'sync'):
+        raise ValueError(f"Unknown import mode: {mode}")
+    if sync_action not in ('deactivate', 'delete'):
+        raise ValueError(f"Unknown sync action: {sync_action}")
+    
+    sync = mode == 'sync'
+    registry_mode = content_mode(mode, sync_action)
+    rejects = RejectWriter(reject_file_path(self.request.id))
+    queue = (self.request.delivery_info or {}).get('routing_key')
+    backlog = QueueBacklog(queue, estimated_rows)
+    task_started = time.perf_counter()
+    memory = PeakMemory()
     try:
-        # Read CSV file
-        df = pd.read_csv(file_path)
-        total_rows = len(df)
-        
-        # Validate required columns
-        required_columns = ['sku', 'name']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise ValueError(f"Missing required columns: {missing_columns}")
-        
-        # Handle optional columns with defaults
-        if 'description' in df.columns:
-            df['description'] = df['description'].fillna('')
-        else:
-            df['description'] = ''
-        
-        if 'active' in df.columns:
-            df['active'] = df['active'].fillna(True)
-        else:
-            df['active'] = True
+        # Row count measured at upload; count newlines if it wasn't passed
+        total_rows = estimated_rows or count_csv_rows(file_path)
+        
+        _record_job(
+            self.request.id,
+            status='running',
+            mode=mode,
+            queue=queue,
+            content_hash=content_hash,
+            file_size=os.path.getsize(file_path),
+            total_rows=total_rows,
+            started_at=datetime.utcnow()
+        )
         
         # Calculate timestamps once for all rows (major optimization)
         current_time = datetime.utcnow()
-        df['created_at'] = current_time
-        df['updated_at'] = current_time
         
-        # Convert data types upfront for better performance
-        df['sku'] = df['sku'].astype(str)
-        df['name'] = df['name'].astype(str)
-        df['description'] = df['description'].astype(str)
-        df['active'] = df['active'].astype(bool)
+        # Batch size adapts to the measured write latency
+        sizer = AdaptiveBatchSizer(
+            initial_size=chunk_size or settings.chunk_size,
+            num_columns=len(UPSERT_COLUMNS),
+            target_seconds=settings.import_batch_target_seconds,
+            min_size=settings.import_min_batch_size,
+            max_size=settings.import_max_batch_size,
+            memory_budget_bytes=settings.import_memory_budget_mb * 1024 * 1024
+        )
+        sizer.set_row_bytes(estimate_row_bytes(
+            pd.read_csv(file_path, dtype=str, keep_default_na=False, nrows=1000)
+        ))
         
-        # Process in larger chunks for better performance
         processed = 0
+        loaded = 0
+        inserted = 0
+        removed = 0
+        sync_seconds = 0.0
+        staged = 0
+        batches = 0
+        pending_records = []
+        pending_rows = []
         
-        for i in range(0, total_rows, chunk_size):
-            chunk = df.iloc[i:i + chunk_size]
-            
-            # Deduplicate within the chunk - keep last occurrence
-            chunk = chunk.drop_duplicates(subset=['sku'], keep='last')
-            
-            # Convert chunk to list of dicts more efficiently
-            values_list = chunk.to_dict('records')
+        def write_batch(size: int) -> tuple[int, int]:
+            records, row_numbers = _dedupe_records(pending_records[:size], pending_rows[:size])
+            del pending_records[:size]
+            del pending_rows[:size]
             
             # Use PostgreSQL INSERT ... ON CONFLICT DO UPDATE
-            stmt = insert(Product).values(values_list)
-            
-            # Define what to do on conflict (duplicate SKU)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=['sku'],
-                set_={
-                    'name': stmt.excluded.name,
-                    'description': stmt.excluded.description,
-                    'active': stmt.excluded.active,
-                    'updated_at': stmt.excluded.updated_at
-                }
-            )
-            
-            # Execute the statement
-            self.db.execute(stmt)
-            self.db.commit()
-            
-            processed += len(chunk)
-            
-            # Update progress less frequently (only every 2 chunks or at end)
-            if i % (chunk_size * 2) == 0 or processed >= total_rows:
-                progress = int((processed / total_rows) * 100)
-                self.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'current': processed,
-                        'total': total_rows,
-                        'percent': progress
-                    }
-                )
+            started = time.perf_counter()
+            counts = _upsert_with_bisect(self.db, records, row_numbers, rejects)
+            sizer.record(len(records), time.perf_counter() - started)
+            memory.sample()
+            return counts
+        
+        # Parsing runs on a background thread while this one writes to the DB;
+        # the bounded queue keeps at most import_pipeline_depth chunks in memory
+        chunks = _prepared_chunks(file_path, settings.chunk_size, current_time, collect_skus=sync)
+        with Prefetcher(chunks, settings.import_pipeline_depth, name='csv-parser') as parser:
+            for records, row_numbers, rejected, raw_rows, seen_skus in parser:
+                if seen_skus:
+                    _stage_skus(self.db, self.request.id, seen_skus)
+                    staged += len(seen_skus)
+                rejects.write_frame(rejected)
+                pending_records.extend(records)
+                pending_rows.extend(row_numbers)
+                processed += raw_rows
+                
+                while len(pending_records) >= sizer.batch_size:
+                    batch_inserted, batch_written = write_batch(sizer.batch_size)
+                    inserted += batch_inserted
+                    loaded += batch_written
+                    batches += 1
+                    
+                    # Update progress less frequently (only every 2 batches)
+                    if batches % 2 == 1:
+                        written = processed - len(pending_records)
+                        backlog.advance(written)
+                        self.update_state(
+                            state='PROGRESS',
+                            meta={
+                                'current': written,
+                                'total': max(total_rows, written),
+                                'percent': min(int(written / max(total_rows, 1) * 100), 99)
+                            }
+                        )
+                        _record_job(self.request.id, processed_rows=written)
+        
+        if pending_records:
+            batch_inserted, batch_written = write_batch(len(pending_records))
+            inserted += batch_inserted
+            loaded += batch_written
+        
+        total_rows = processed
+        
+        if sync:
+            # An empty file would otherwise wipe the whole catalog
+            if not staged:
+                raise ValueError("Sync import contains no SKUs; refusing to remove every product")
+            sync_started = time.perf_counter()
+            removed = _remove_missing_products(self.db, self.request.id, sync_action, current_time)
+            sync_seconds = time.perf_counter() - sync_started
         
         # Final progress update
         self.update_state(
@@ -116,20 +342,84 @@ def import_products_task(self, file_path: str, chunk_size: int = 5000):
             }
         )
         
+        reject_file = rejects.close()
+        try:
+            prune_reject_files(settings.reject_retention_seconds)
+        except OSError as e:
+            print(f"Reject file cleanup failed: {str(e)}")
+        
         # Clean up uploaded file
         if os.path.exists(file_path):
             os.remove(file_path)
         
+        # Identical uploads are skipped until the catalog changes again
+        # (see app.utils.upload_store)
+        if content_hash:
+            complete_content(content_hash, self.request.id, registry_mode, crud.get_catalog_version(self.db))
+        
+        total_seconds = time.perf_counter() - task_started
+        _record_job(
+            self.request.id,
+            status='completed',
+            total_rows=total_rows,
+            processed_rows=processed,
+            inserted_rows=inserted,
+            updated_rows=loaded - inserted,
+            rejected_rows=rejects.count,
+            removed_rows=removed,
+            parse_seconds=round(parser.produce_seconds, 3),
+            write_seconds=round(sizer.total_seconds, 3),
+            sync_seconds=round(sync_seconds, 3),
+            total_seconds=round(total_seconds, 3),
+            rows_per_second=round(processed / total_seconds, 1) if total_seconds else None,
+            peak_memory_mb=memory.peak_mb(),
+            finished_at=datetime.utcnow()
+        )
+        
+        message = f'Successfully imported {loaded} products'
+        if rejects.count:
+            message += f', {rejects.count} rows rejected'
+        if sync:
+            message += f', {removed} missing products {"deleted" if sync_action == "delete" else "deactivated"}'
+        
         return {
             'status': 'completed',
             'total': total_rows,
             'processed': processed,
-            'message': f'Successfully imported {processed} products'
+            'loaded': loaded,
+            'inserted': inserted,
+            'updated': loaded - inserted,
+            'rejected': rejects.count,
+            'mode': mode,
+            'removed': removed,
+            'reject_file': f'/api/upload/{self.request.id}/rejects' if reject_file else None,
+            'batch_sizes': sizer.summary(),
+            'message': message
         }
         
     except Exception as e:
         self.db.rollback()
-        # Clean up file on error
+        _record_job(
+            self.request.id,
+            status='failed',
+            error=str(e),
+            total_seconds=round(time.perf_counter() - task_started, 3),
+            peak_memory_mb=memory.peak_mb(),
+            finished_at=datetime.utcnow()
+        )
+        rejects.discard()
+        if sync:
+            try:
+                _clear_staged_skus(self.db, self.request.id)
+            except Exception:
+                # Don't mask the original error; stale rows only cost space
+                self.db.rollback()
+        # Clean up file on error - before releasing the claim, so a retry
+        # that re-claims the content can't have its new file removed
         if os.path.exists(file_path):
             os.remove(file_path)
+        if content_hash:
+            release_content(content_hash, self.request.id, registry_mode)
         raise e
+    finally:
+        backlog.finish()
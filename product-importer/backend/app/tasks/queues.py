@@ -0,0 +1,97 @@
+# Import queue routing & queue depth reporting
+from typing import Optional, List, Dict, Any
+from app.config import settings
+from app.utils.redis_client import get_redis
+
+PRIORITY_QUEUE = "imports.priority"
+DEFAULT_QUEUE = "imports.default"
+BULK_QUEUE = "imports.bulk"
+
+IMPORT_QUEUES = [PRIORITY_QUEUE, DEFAULT_QUEUE, BULK_QUEUE]
+
+PRIORITY_ROUTES = {
+    "high": PRIORITY_QUEUE,
+    "normal": DEFAULT_QUEUE,
+    "low": BULK_QUEUE,
+}
+
+
+def _pending_rows_key(queue: str) -> str:
+    return f"importer:queue:{queue}:pending_rows"
+
+
+def select_import_queue(row_count: int, byte_size: int, priority: Optional[str] = None) -> str:
+    """
+    Pick the queue for an import job.
+
+    Args:
+        row_count: Number of data rows measured during upload
+        byte_size: Size of the uploaded file in bytes
+        priority: Optional explicit priority (high, normal, low)
+
+    Returns:
+        Name of the Celery queue to route the job to
+    """
+    if priority:
+        return PRIORITY_ROUTES[priority]
+    
+    if row_count <= settings.small_import_max_rows and byte_size <= settings.small_import_max_bytes:
+        return PRIORITY_QUEUE
+    if row_count >= settings.bulk_import_min_rows or byte_size >= settings.bulk_import_min_bytes:
+        return BULK_QUEUE
+    return DEFAULT_QUEUE
+
+
+def reserve_queue_rows(queue: str, rows: int) -> int:
+    """Add a job's rows to the queue backlog. Returns the backlog ahead of it."""
+    key = _pending_rows_key(queue)
+    pipe = get_redis().pipeline()
+    pipe.incrby(key, rows)
+    # Rows of a hard-killed worker are never released; letting the counter
+    # lapse once the queue has been idle this long bounds that drift
+    pipe.expire(key, settings.import_queue_counter_ttl)
+    backlog = pipe.execute()[0]
+    return max(backlog - rows, 0)
+
+
+def release_queue_rows(queue: str, rows: int) -> None:
+    """Remove processed (or abandoned) rows from the queue backlog."""
+    if rows <= 0:
+        return
+    client = get_redis()
+    key = _pending_rows_key(queue)
+    if client.decrby(key, rows) <= 0:
+        # Drained (or released after the counter lapsed) - start from zero
+        client.delete(key)
+
+
+def estimate_wait_seconds(backlog_rows: int) -> float:
+    return round(backlog_rows / settings.import_rows_per_second, 1)
+
+
+def get_queue_stats() -> List[Dict[str, Any]]:
+    """
+    Report depth and estimated wait for every import queue.
+
+    depth is the number of jobs not yet picked up by a worker (the length
+    of the broker list); pending_rows also includes rows of running jobs
+    that are still to be written.
+    """
+    client = get_redis()
+    pipe = client.pipeline()
+    for queue in IMPORT_QUEUES:
+        pipe.llen(queue)
+        pipe.get(_pending_rows_key(queue))
+    results = pipe.execute()
+    
+    stats = []
+    for index, queue in enumerate(IMPORT_QUEUES):
+        depth, pending_rows = results[index * 2], results[index * 2 + 1]
+        pending_rows = max(int(pending_rows or 0), 0)
+        stats.append({
+            "queue": queue,
+            "depth": depth,
+            "pending_rows": pending_rows,
+            "estimated_wait_seconds": estimate_wait_seconds(pending_rows),
+        })
+    return stats
@@ -0,0 +1,121 @@
+# Adaptive batch sizing for the import upsert loop
+from typing import Any, Dict, List
+
+# PostgreSQL's wire protocol caps a statement at 65535 bind parameters
+POSTGRES_MAX_BIND_PARAMS = 65535
+
+# Rough multiplier from a row's pandas footprint to its in-flight cost
+# (record dict, bound parameters and the compiled statement)
+ROW_MEMORY_FACTOR = 3
+
+
+def estimate_row_bytes(frame) -> int:
+    """
+    Estimate the memory one row costs while it is being written.
+
+    Args:
+        frame: Sample of rows as read from the CSV
+
+    Returns:
+        Approximate bytes per row (0 if the sample is empty)
+    """
+    if frame is None or len(frame) == 0:
+        return 0
+    sample_bytes = frame.memory_usage(deep=True, index=False).sum()
+    return int(sample_bytes / len(frame) * ROW_MEMORY_FACTOR)
+
+
+class AdaptiveBatchSizer:
+    """
+    Picks the next batch size from measured execute + commit latency.
+
+    Each batch is sized so it should take about target_seconds, based on a
+    smoothed per-row cost. Changes are limited to halving or doubling per
+    batch, and the size always stays within the bind-parameter limit for
+    the number of columns and the memory budget.
+    """
+
+    def __init__(
+        self,
+        initial_size: int,
+        num_columns: int,
+        target_seconds: float,
+        min_size: int,
+        max_size: int,
+        memory_budget_bytes: int,
+        smoothing: float = 0.5
+    ):
+        self.num_columns = num_columns
+        self.target_seconds = target_seconds
+        self.min_size = min_size
+        self.max_size = max_size
+        self.memory_budget_bytes = memory_budget_bytes
+        self.smoothing = smoothing
+        self.row_bytes = 0
+        self._seconds_per_row = None
+        self.initial_size = self._clamp(initial_size)
+        self.batch_size = self.initial_size
+        self.sizes: List[int] = []
+        self.total_seconds = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Largest batch allowed by the bind-parameter limit, max_size and memory budget."""
+        limit = min(self.max_size, POSTGRES_MAX_BIND_PARAMS // self.num_columns)
+        if self.row_bytes:
+            limit = min(limit, self.memory_budget_bytes // self.row_bytes)
+        return max(limit, 1)
+
+    def _clamp(self, size: float) -> int:
+        return max(min(int(size), self.limit), min(self.min_size, self.limit))
+
+    def set_row_bytes(self, row_bytes: int) -> None:
+        """Update the per-row memory estimate and re-apply the limits."""
+        self.row_bytes = row_bytes
+        self.batch_size = self._clamp(self.batch_size)
+
+    def record(self, rows: int, seconds: float) -> int:
+        """
+        Record a finished batch and compute the next batch size.
+
+        Args:
+            rows: Rows sent in the batch
+            seconds: Execute + commit time of the batch
+
+        Returns:
+            The next batch size
+        """
+        if rows <= 0:
+            return self.batch_size
+        
+        self.sizes.append(rows)
+        self.total_seconds += seconds
+        
+        per_row = seconds / rows
+        if self._seconds_per_row is None:
+            self._seconds_per_row = per_row
+        else:
+            self._seconds_per_row += self.smoothing * (per_row - self._seconds_per_row)
+        
+        if self._seconds_per_row > 0:
+            ideal = self.target_seconds / self._seconds_per_row
+        else:
+            ideal = self.batch_size * 2
+        ideal = min(max(ideal, self.batch_size / 2), self.batch_size * 2)
+        
+        self.batch_size = self._clamp(ideal)
+        return self.batch_size
+
+    def summary(self) -> Dict[str, Any]:
+        """Batch sizes chosen during the run, for the task result."""
+        return {
+            'initial': self.initial_size,
+            'final': self.batch_size,
+            'min': min(self.sizes) if self.sizes else 0,
+            'max': max(self.sizes) if self.sizes else 0,
+            'mean': round(sum(self.sizes) / len(self.sizes)) if self.sizes else 0,
+            'limit': self.limit,
+            'target_seconds': self.target_seconds,
+            'write_seconds': round(self.total_seconds, 3),
+            'sizes': self.sizes,
+        }
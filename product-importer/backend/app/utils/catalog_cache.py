@@ -0,0 +1,19 @@
+# ETag helpers for conditional GETs (the catalog version lives in Postgres, see crud)
+import hashlib
+from typing import Optional
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the given parts."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
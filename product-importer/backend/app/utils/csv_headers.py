@@ -0,0 +1,32 @@
+# Lightweight CSV header checks (no pandas, safe to import from the API)
+import csv
+
+
+def validate_csv_headers(file_path: str) -> tuple[bool, str]:
+    """
+    Validate that the CSV file contains all required columns.
+    
+    Only the header line is read, with the standard csv module.
+    
+    Args:
+        file_path: Path to the CSV file
+        
+    Returns:
+        Tuple of (is_valid, message)
+    """
+    try:
+        with open(file_path, newline='', encoding='utf-8-sig') as f:
+            columns = next(csv.reader(f), None)
+        if not columns:
+            return False, "Error reading CSV: No columns to parse from file"
+        
+        required_columns = ['sku', 'name', 'description']
+        
+        missing_columns = [col for col in required_columns if col not in columns]
+        
+        if missing_columns:
+            return False, f"Missing required columns: {', '.join(missing_columns)}"
+        
+        return True, "Valid CSV format"
+    except Exception as e:
+        return False, f"Error reading CSV: {str(e)}"
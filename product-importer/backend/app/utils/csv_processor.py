@@ -3,29 +3,117 @@ import os
 from typing import List, Dict, Any, Generator
 from app.config import settings
 
+MAX_SKU_LENGTH = 100
+MAX_NAME_LENGTH = 255
 
-def validate_csv_headers(file_path: str) -> tuple[bool, str]:
+ACTIVE_VALUES = {
+    '': True,
+    'true': True, 't': True, 'yes': True, 'y': True, '1': True,
+    'false': False, 'f': False, 'no': False, 'n': False, '0': False,
+}
+
+
+def prepare_chunk(chunk: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
-    Validate that the CSV file contains all required columns.
-    
+    Validate and normalise a chunk of raw CSV rows.
+
+    The chunk must be read with dtype=str and keep_default_na=False. All
+    checks are vectorized; a row collects every reason it fails.
+
+    Args:
+        chunk: Raw rows, indexed by their 0-based position in the file
+
+    Returns:
+        Tuple of (valid, rejected). valid has sku, name, description and
+        active columns ready for the upsert. rejected holds the raw values
+        plus row_number and reason columns.
+    """
+    sku = chunk['sku'].str.strip()
+    name = chunk['name'].str.strip()
+    description = chunk['description'] if 'description' in chunk.columns else pd.Series('', index=chunk.index)
+    raw_active = chunk['active'] if 'active' in chunk.columns else pd.Series('', index=chunk.index)
+    active = raw_active.str.strip().str.lower().map(ACTIVE_VALUES)
+
+    checks = [
+        (sku == '', 'sku is required'),
+        (sku.str.len() > MAX_SKU_LENGTH, f'sku longer than {MAX_SKU_LENGTH} characters'),
+        (name == '', 'name is required'),
+        (name.str.len() > MAX_NAME_LENGTH, f'name longer than {MAX_NAME_LENGTH} characters'),
+        (active.isna(), 'unparsable active value'),
+        # Postgres text can't hold NUL; psycopg2 would fail the whole batch
+        (sku.str.contains('\x00', regex=False), 'sku contains a NUL byte'),
+        (name.str.contains('\x00', regex=False), 'name contains a NUL byte'),
+        (description.str.contains('\x00', regex=False), 'description contains a NUL byte'),
+    ]
+
+    reasons = pd.Series('', index=chunk.index)
+    for mask, message in checks:
+        reasons = reasons.mask(mask, reasons + message + '; ')
+    invalid = reasons != ''
+
+    rejected = pd.DataFrame({
+        'row_number': chunk.index[invalid] + 1,
+        'sku': chunk['sku'][invalid],
+        'name': chunk['name'][invalid],
+        'description': description[invalid],
+        'active': raw_active[invalid],
+        'reason': reasons[invalid].str.rstrip('; '),
+    })
+
+    valid = pd.DataFrame({
+        'sku': sku[~invalid],
+        'name': name[~invalid],
+        'description': description[~invalid],
+        'active': active[~invalid].astype(bool),
+    })
+
+    return valid, rejected
+
+
+def read_csv_chunks(file_path: str, chunk_size: int) -> Generator[pd.DataFrame, None, None]:
+    """
+    Read a CSV file as raw text chunks, ready for prepare_chunk.
+
     Args:
         file_path: Path to the CSV file
-        
+        chunk_size: Number of rows per chunk
+
+    Yields:
+        DataFrames indexed by each row's 0-based position in the file
+
+    Raises:
+        ValueError: If the sku or name column is missing
+    """
+    reader = pd.read_csv(file_path, dtype=str, keep_default_na=False, chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            missing_columns = [col for col in ['sku', 'name'] if col not in chunk.columns]
+            if missing_columns:
+                raise ValueError(f"Missing required columns: {missing_columns}")
+            yield chunk
+
+
+def count_csv_rows(file_path: str) -> int:
+    """
+    Count data rows by counting newlines, without parsing the file.
+
+    Quoted fields containing newlines make this an over-estimate.
+
+    Args:
+        file_path: Path to the CSV file
+
     Returns:
-        Tuple of (is_valid, message)
+        Approximate number of rows (excluding header)
     """
-    try:
-        df = pd.read_csv(file_path, nrows=0)
-        required_columns = ['sku', 'name', 'description']
-        
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            return False, f"Missing required columns: {', '.join(missing_columns)}"
-        
-        return True, "Valid CSV format"
-    except Exception as e:
-        return False, f"Error reading CSV: {str(e)}"
+    rows = 0
+    last_block = b''
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            rows += block.count(b'\n')
+            last_block = block
+    if last_block and not last_block.endswith(b'\n'):
+        rows += 1
+    return max(rows - 1, 0)
 
 
 def process_csv_chunk(file_path: str, chunk_size: int = 10000) -> Generator[List[Dict[str, Any]], None, None]:
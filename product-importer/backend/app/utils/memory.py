@@ -0,0 +1,53 @@
+# Per-task peak memory for the import ledger
+from typing import Optional
+
+PROC_STATUS = "/proc/self/status"
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _read_status_kb(field: str) -> Optional[int]:
+    try:
+        with open(PROC_STATUS) as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class PeakMemory:
+    """
+    Peak resident memory of one task, not of the whole worker process.
+
+    ru_maxrss (and VmHWM) only ever grow, so a worker that ran one large
+    import would report that peak for every later job. On Linux the
+    high-water mark is reset at start by writing 5 to clear_refs and read
+    back from VmHWM. Where that isn't allowed, VmRSS is sampled at each
+    call to sample() and the maximum is kept. Without /proc, peak_mb() is None.
+    """
+
+    def __init__(self):
+        self._hwm_reset = False
+        try:
+            with open(PROC_CLEAR_REFS, "w") as clear_refs:
+                clear_refs.write("5")
+            self._hwm_reset = True
+        except OSError:
+            pass
+        self._peak_kb = _read_status_kb("VmRSS")
+
+    def sample(self) -> None:
+        if self._hwm_reset:
+            return
+        rss = _read_status_kb("VmRSS")
+        if rss is not None and (self._peak_kb is None or rss > self._peak_kb):
+            self._peak_kb = rss
+
+    def peak_mb(self) -> Optional[float]:
+        if self._hwm_reset:
+            peak = _read_status_kb("VmHWM")
+        else:
+            self.sample()
+            peak = self._peak_kb
+        return round(peak / 1024, 1) if peak is not None else None
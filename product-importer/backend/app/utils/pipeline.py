@@ -0,0 +1,87 @@
+# Background prefetching for producer/consumer pipelines
+import queue
+import threading
+import time
+from typing import Iterable, Iterator, Any
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class Prefetcher:
+    """
+    Runs an iterable on a background thread, buffering at most max_pending
+    items so the consumer can work on item N while item N+1 is produced.
+
+    Use as a context manager and iterate over it. An exception raised by
+    the producer is re-raised in the consumer; when the consumer stops
+    early (or raises), the producer is stopped and joined on exit.
+    """
+
+    def __init__(self, iterable: Iterable, max_pending: int, name: str = "prefetch"):
+        self._iterable = iterable
+        self._queue = queue.Queue(maxsize=max(max_pending, 1))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.produce_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def _put(self, item) -> bool:
+        # Blocks while the queue is full (backpressure) but gives up once stopped
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        iterator = None
+        try:
+            iterator = iter(self._iterable)
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    self.produce_seconds += time.perf_counter() - started
+                if not self._put(item):
+                    return
+            self._put(_DONE)
+        except BaseException as e:
+            self._put(_Failure(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            started = time.perf_counter()
+            item = self._queue.get()
+            self.wait_seconds += time.perf_counter() - started
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,9 @@
+# Shared Redis connection
+import redis
+from functools import lru_cache
+from app.config import settings
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    return redis.Redis.from_url(settings.redis_url, decode_responses=True)
@@ -0,0 +1,110 @@
+# Reject file handling for rows skipped during import
+import csv
+import os
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+from app.config import settings
+
+REJECT_COLUMNS = ['row_number', 'sku', 'name', 'description', 'active', 'reason']
+
+# Suffix of a reject file still being written
+PARTIAL_SUFFIX = '.part'
+
+
+def reject_file_path(task_id: str) -> str:
+    """
+    Get the reject file location for an import task.
+
+    Args:
+        task_id: Celery task id of the import
+
+    Returns:
+        Path of the reject CSV (the file may not exist)
+
+    Raises:
+        ValueError: If task_id is not a valid task id
+    """
+    return os.path.join(settings.reject_dir, f"{UUID(task_id)}.csv")
+
+
+class RejectWriter:
+    """
+    Streams rejected rows and their reasons to a CSV file.
+
+    The file is only created once the first row is rejected, so clean
+    imports leave nothing behind. Rows go to a .part file that is renamed
+    into place by close(), so the download never serves a partial file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.partial_path = path + PARTIAL_SUFFIX
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def _ensure_open(self):
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.partial_path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(REJECT_COLUMNS)
+
+    def write_frame(self, rejected) -> None:
+        """Write a DataFrame of rejected rows (as returned by prepare_chunk)."""
+        if rejected is None or rejected.empty:
+            return
+        self._ensure_open()
+        self._writer.writerows(rejected[REJECT_COLUMNS].itertuples(index=False, name=None))
+        self.count += len(rejected)
+
+    def write_record(self, row_number: int, record: Dict[str, Any], reason: str) -> None:
+        """Write a single record that was rejected by the database."""
+        self._ensure_open()
+        self._writer.writerow([row_number] + [record.get(col, '') for col in REJECT_COLUMNS[1:-1]] + [reason])
+        self.count += 1
+
+    def close(self) -> Optional[str]:
+        """Close the file and publish it. Returns its path if any row was rejected."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+            os.replace(self.partial_path, self.path)
+        return self.path if self.count else None
+
+    def discard(self) -> None:
+        """Close and remove the file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+        for path in (self.partial_path, self.path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def prune_reject_files(max_age_seconds: int) -> int:
+    """
+    Remove reject files (and abandoned partial ones) older than max_age_seconds.
+
+    Returns:
+        Number of files removed
+    """
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    try:
+        entries = list(os.scandir(settings.reject_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(('.csv', '.csv' + PARTIAL_SUFFIX)):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
@@ -0,0 +1,175 @@
+# Content-addressed storage for uploaded CSV files
+import asyncio
+import hashlib
+import json
+import os
+import redis
+import aiofiles
+from typing import NamedTuple, Optional, Dict, Any
+from uuid import uuid4
+from app.config import settings
+from app.utils.redis_client import get_redis
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class StoredUpload(NamedTuple):
+    temp_path: str
+    content_hash: str
+    size: int
+    rows: int
+
+
+def content_path(content_hash: str, mode: str = "upsert") -> str:
+    # One file per registry mode: an upsert and a sync of the same content
+    # can run at the same time and each removes its own file when done
+    if mode == "upsert":
+        return os.path.join(settings.upload_dir, f"{content_hash}.csv")
+    return os.path.join(settings.upload_dir, f"{content_hash}.{mode.replace(':', '-')}.csv")
+
+
+async def store_upload(file) -> StoredUpload:
+    """
+    Stream an upload to a private temp file, hashing and measuring it on the way.
+
+    Args:
+        file: FastAPI UploadFile
+
+    Returns:
+        StoredUpload with the temp path, SHA-256 of the content, byte size
+        and data row count (quoted newlines over-count slightly)
+
+    Raises:
+        UploadTooLarge: If the file exceeds settings.max_upload_size
+    """
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    temp_path = os.path.join(settings.upload_dir, f".incoming-{uuid4().hex}")
+    
+    digest = hashlib.sha256()
+    size = 0
+    newlines = 0
+    last_block = b''
+    
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            while True:
+                block = await file.read(READ_BLOCK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > settings.max_upload_size:
+                    raise UploadTooLarge()
+                # hashlib releases the GIL, so hash off the event loop
+                await asyncio.to_thread(digest.update, block)
+                newlines += block.count(b'\n')
+                last_block = block
+                await f.write(block)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    lines = newlines + (1 if last_block and not last_block.endswith(b'\n') else 0)
+    return StoredUpload(temp_path, digest.hexdigest(), size, max(lines - 1, 0))
+
+
+def commit_upload(stored: StoredUpload, mode: str = "upsert") -> str:
+    """Move a stored upload to its content-addressed path."""
+    path = content_path(stored.content_hash, mode)
+    os.replace(stored.temp_path, path)
+    return path
+
+
+def discard_upload(stored: StoredUpload) -> None:
+    if os.path.exists(stored.temp_path):
+        os.remove(stored.temp_path)
+
+
+def content_mode(mode: str, sync_action: str) -> str:
+    """Registry mode for an import, e.g. upsert or sync:delete."""
+    return mode if mode == "upsert" else f"{mode}:{sync_action}"
+
+
+def _content_key(content_hash: str, mode: str = "upsert") -> str:
+    if mode == "upsert":
+        return f"importer:content:{content_hash}"
+    return f"importer:content:{content_hash}:{mode}"
+
+
+def claim_content(
+    content_hash: str,
+    task_id: str,
+    force: bool = False,
+    mode: str = "upsert",
+    catalog_version: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Register task_id as the import of this content.
+
+    A completed import only counts as a duplicate while the catalog is still
+    at the version it left behind; after any other write (e.g. file X, then
+    Y, then X again) the content is imported again.
+
+    Args:
+        content_hash: SHA-256 of the file
+        task_id: Task id the new import will use
+        force: Claim even if the same content was already imported
+        mode: Import mode; the same file imported another way is not a duplicate
+        catalog_version: Current catalog version (None if unknown - never a
+            completed duplicate then)
+
+    Returns:
+        None if claimed, otherwise the existing entry
+        ({"task_id", "status"}, status being processing or completed)
+    """
+    key = _content_key(content_hash, mode)
+    claim = json.dumps({"task_id": task_id, "status": "processing"})
+    
+    with get_redis().pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                raw = pipe.get(key)
+                existing = json.loads(raw) if raw else None
+                if existing and existing["status"] == "completed" and (
+                    force
+                    or catalog_version is None
+                    or existing.get("catalog_version") != catalog_version
+                ):
+                    existing = None
+                if existing:
+                    pipe.unwatch()
+                    return existing
+                pipe.multi()
+                pipe.set(key, claim, ex=settings.duplicate_processing_ttl)
+                pipe.execute()
+                return None
+            except redis.WatchError:
+                continue
+
+
+def complete_content(
+    content_hash: str,
+    task_id: str,
+    mode: str = "upsert",
+    catalog_version: Optional[str] = None
+) -> None:
+    """Record that task_id imported this content, leaving the catalog at catalog_version."""
+    get_redis().set(
+        _content_key(content_hash, mode),
+        json.dumps({"task_id": task_id, "status": "completed", "catalog_version": catalog_version}),
+        ex=settings.duplicate_completed_ttl
+    )
+
+
+def release_content(content_hash: str, task_id: str, mode: str = "upsert") -> None:
+    """Drop the claim held by task_id so the same content can be uploaded again."""
+    key = _content_key(content_hash, mode)
+    client = get_redis()
+    raw = client.get(key)
+    if raw and json.loads(raw)["task_id"] == task_id:
+        client.delete(key)